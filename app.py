@@ -5,35 +5,207 @@ Fully dynamic: RCAFT prompt enhancement drives the entire pipeline.
 Works for ANY business type or search scenario.
 """
 
+import os
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
 import streamlit as st
 import pandas as pd
 
-from src.prompt_enhancer import enhance_prompt
-from src.ai_agent import (
-    generate_maps_queries,
-    generate_web_search_queries,
-    generate_location_info,
-    fuzzy_merge_records,
-    deduplicate_by_name,
-)
-from src.serp_search import (
-    search_serp_multiple,
-    enrich_with_place_details,
-    search_google_local,
-    search_google_web,
-    search_yelp,
-)
-from src.perplexity_research import (
-    research_businesses,
-    research_all_field_groups,
-)
-from src.excel_exporter import export_to_excel
 from src.config import OPENAI_API_KEY, SERPAPI_KEY, PERPLEXITY_API_KEY
 
 # ─── Page Config ──────────────────────────────────────────────────────
 st.set_page_config(page_title="AI Data Scraper", page_icon="🔍", layout="wide")
 
+# ─── Cached API calls ─────────────────────────────────────────────────
+# Streamlit reruns the whole script on every interaction, so identical
+# inputs are served from cache. Args prefixed with "_" (the API keys) are
+# not hashed — they don't change the result. Each wrapper imports its module
+# on first call, so idle reruns and first paint skip openai, rapidfuzz and friends.
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_enhance(_api_key: str, raw_input: str) -> dict:
+    from src.prompt_enhancer import enhance_prompt
+    return enhance_prompt(_api_key, raw_input)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_location(_api_key: str, requirement: str) -> dict:
+    from src.ai_agent import generate_location_info
+    loc = generate_location_info(_api_key, requirement)
+    if not isinstance(loc, dict) or not loc:
+        # Raise so the unparseable reply isn't cached; the caller searches without a location
+        raise ValueError("Could not extract a location from the requirement")
+    return loc
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_maps_queries(
+    _api_key: str, requirement: str, search_keywords: list[str], location: str, num_queries: int
+) -> list[str]:
+    from src.ai_agent import generate_maps_queries
+    return generate_maps_queries(_api_key, requirement, search_keywords, location, num_queries=num_queries)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_web_queries(
+    _api_key: str, requirement: str, search_keywords: list[str], location: str,
+    target_sources: list[str], num_queries: int,
+) -> list[str]:
+    from src.ai_agent import generate_web_search_queries
+    return generate_web_search_queries(
+        _api_key, requirement, search_keywords, location, target_sources, num_queries=num_queries
+    )
+
+
+# SerpAPI results are stable for a fixed query and cost credits, so keep them for a day.
+# A failed request raises (SerpAPIError) instead of returning [], so st.cache_data never
+# stores it and the next run — e.g. with a corrected key — asks again.
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _cached_serp_multiple(
+    _api_key: str, queries: tuple[str, ...], results_per_query: int, lat: float | None, lng: float | None
+) -> list[dict]:
+    from src.serp_search import search_serp_multiple
+    return search_serp_multiple(list(queries), _api_key, results_per_query=results_per_query, lat=lat, lng=lng)
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _cached_google_web(_api_key: str, queries: tuple[str, ...], location: str, results_per_query: int) -> list[dict]:
+    from src.serp_search import search_google_web
+    return search_google_web(list(queries), _api_key, location=location, results_per_query=results_per_query)
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _cached_yelp(_api_key: str, query: str, location: str) -> list[dict]:
+    from src.serp_search import search_yelp
+    return search_yelp(query, _api_key, location=location)
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _cached_google_local(_api_key: str, query: str, location: str) -> list[dict]:
+    from src.serp_search import search_google_local
+    return search_google_local(query, _api_key, location=location)
+
+
+def _records_frame(records: list[dict]) -> pd.DataFrame:
+    """Records as Arrow-backed strings (mixed-type columns are common), blanks for missing.
+    st.dataframe hands Arrow-backed columns to the browser without another conversion."""
+    return pd.DataFrame.from_records(records).astype("string[pyarrow]").fillna("")
+
+
+def _merge_into(merged: list[dict], records: list[dict]) -> list[dict]:
+    """Fold one more source into the running merge. Folding lists in order gives
+    the same result as merging them all in one fuzzy_merge_records call."""
+    from src.ai_agent import add_match_keys, fuzzy_merge_records
+    if not records:
+        return merged
+    add_match_keys(records)
+    return fuzzy_merge_records(merged, records) if merged else fuzzy_merge_records(records)
+
+
+# Only the latest export is shown, so a few entries cover reruns without
+# keeping every past file's frame and bytes for the life of the server.
+RESULTS_CACHE_ENTRIES = 4
+
+
+@st.cache_data(max_entries=RESULTS_CACHE_ENTRIES, show_spinner=False)
+def _load_results(path: str, mtime: float) -> pd.DataFrame:
+    """Exported records reloaded for display; mtime is part of the key."""
+    return pd.read_excel(path, engine="openpyxl").astype("string[pyarrow]").fillna("")
+
+
+@st.cache_data(max_entries=RESULTS_CACHE_ENTRIES, show_spinner=False)
+def _read_bytes(path: str, mtime: float) -> bytes:
+    """Exported file contents; mtime is part of the key."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.fragment
+def _previous_results(filepath: str):
+    """Last run's table + download. A fragment, so its widgets rerun only this block."""
+    try:
+        mtime = os.path.getmtime(filepath)
+    except FileNotFoundError:
+        st.warning("File not found. Run a new scrape.")
+        return
+
+    df = _load_results(filepath, mtime)
+    st.info(f"Previous run — **{len(df)} records**")
+    st.dataframe(df, width="stretch", height=400)
+
+    st.download_button(
+        label="⬇️ Download Excel", data=_read_bytes(filepath, mtime),
+        file_name=filepath.split("/")[-1],
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        type="primary", width="stretch",
+    )
+
+
+@st.fragment
+def _enhanced_preview(enhanced: dict, raw_requirement: str):
+    """RCAFT breakdown + editable prompt. A fragment, so editing the prompt reruns only this block.
+    Edits are written back into the session's enhanced data for the Search step."""
+    rcaft = enhanced.get("rcaft", {})
+    enhanced_prompt_text = enhanced.get("enhanced_prompt", raw_requirement)
+    search_keywords = enhanced.get("search_keywords", [])
+    data_fields = enhanced.get("data_fields", [])
+    target_sources = enhanced.get("target_sources", [])
+    field_groups = enhanced.get("field_groups", [])
+    domain = enhanced.get("domain", "")
+
+    st.markdown("### ✨ RCAFT-Enhanced Prompt")
+    if domain:
+        st.markdown(f"**Detected domain:** {domain}")
+
+    # RCAFT breakdown
+    r_cols = st.columns(5)
+    for col, label, key in zip(r_cols,
+        ["🎭 Role", "📋 Context", "⚡ Action", "📐 Format", "🎯 Tone"],
+        ["role", "context", "action", "format", "tone"]):
+        with col:
+            st.markdown(f"**{label}**")
+            st.caption(str(rcaft.get(key, "—"))[:150])
+
+    # Editable enhanced prompt
+    edited_prompt = st.text_area(
+        "📝 Enhanced Prompt (edit if needed, then click Search Data)",
+        value=enhanced_prompt_text, height=140, key="edited_enhanced_prompt",
+    )
+    enhanced["enhanced_prompt"] = edited_prompt
+
+    # Keywords, fields, sources
+    info_cols = st.columns(3)
+    with info_cols[0]:
+        if search_keywords:
+            st.markdown(f"**🔑 Keywords ({len(search_keywords)})**")
+            st.caption(", ".join(search_keywords[:10]))
+    with info_cols[1]:
+        if data_fields:
+            st.markdown(f"**📊 Data Fields ({len(data_fields)})**")
+            st.caption(", ".join(data_fields[:12]))
+    with info_cols[2]:
+        if target_sources:
+            st.markdown(f"**🌐 Sources ({len(target_sources)})**")
+            st.caption(", ".join(target_sources[:8]))
+
+    # Dynamic field groups preview
+    if field_groups:
+        st.markdown(f"#### 🔬 Research Groups ({len(field_groups)} dynamic categories)")
+        for g in field_groups:
+            gname = g.get("group_name", "?")
+            gfields = g.get("fields", [])
+            gprompt = g.get("research_prompt", "")
+            with st.expander(f"**{gname}** — {', '.join(gfields[:5])}"):
+                st.write(f"**Fields:** {', '.join(gfields)}")
+                st.write(f"**Research focus:** {gprompt[:300]}")
+
+    st.markdown("---")
+
+
 st.markdown("""
 <style>
     .main-header {
@@ -81,12 +253,16 @@ with st.sidebar:
     max_place_details = st.slider("Max place details", 5, 60, 20) if fetch_place_details else 0
     search_yelp_too = st.checkbox("Also search Yelp", value=False)
     search_google_local_too = st.checkbox("Also search Google Local Pack", value=False)
+    refresh_serp = st.checkbox("Ignore cached SerpAPI results", value=False,
+                               help="Results are reused for 24h; tick to fetch fresh ones on the next search")
 
     st.markdown("#### Perplexity Options")
     use_perplexity = st.checkbox("Use Perplexity AI", value=True)
     pplx_discover = st.checkbox("Discover additional businesses", value=True)
     pplx_enrich = st.checkbox("Enrich with dynamic field groups", value=True,
                                help="AI decides what categories of info to research based on your query")
+    pplx_combine = st.checkbox("Combine groups into one call", value=False,
+                                help="One Perplexity call per batch covering every group — fewer calls and tokens, less depth per field")
 
     st.markdown("---")
     st.markdown("### Pipeline")
@@ -144,7 +320,7 @@ if enhance_btn:
 
     with st.spinner("✨ Enhancing with RCAFT framework..."):
         try:
-            enhanced = enhance_prompt(openai_key, raw_requirement)
+            enhanced = _cached_enhance(openai_key, raw_requirement)
             st.session_state["enhanced_data"] = enhanced
         except Exception as e:
             st.error(f"Enhancement failed: {e}")
@@ -152,62 +328,7 @@ if enhance_btn:
 
 # ── Display enhanced prompt ───────────────────────────────────────────
 if st.session_state.get("enhanced_data"):
-    enhanced = st.session_state["enhanced_data"]
-    rcaft = enhanced.get("rcaft", {})
-    enhanced_prompt_text = enhanced.get("enhanced_prompt", raw_requirement)
-    search_keywords = enhanced.get("search_keywords", [])
-    data_fields = enhanced.get("data_fields", [])
-    target_sources = enhanced.get("target_sources", [])
-    field_groups = enhanced.get("field_groups", [])
-    domain = enhanced.get("domain", "")
-
-    st.markdown("### ✨ RCAFT-Enhanced Prompt")
-    if domain:
-        st.markdown(f"**Detected domain:** {domain}")
-
-    # RCAFT breakdown
-    r_cols = st.columns(5)
-    for col, label, key in zip(r_cols,
-        ["🎭 Role", "📋 Context", "⚡ Action", "📐 Format", "🎯 Tone"],
-        ["role", "context", "action", "format", "tone"]):
-        with col:
-            st.markdown(f"**{label}**")
-            st.caption(str(rcaft.get(key, "—"))[:150])
-
-    # Editable enhanced prompt
-    edited_prompt = st.text_area(
-        "📝 Enhanced Prompt (edit if needed, then click Search Data)",
-        value=enhanced_prompt_text, height=140, key="edited_enhanced_prompt",
-    )
-    st.session_state["enhanced_data"]["enhanced_prompt"] = edited_prompt
-
-    # Keywords, fields, sources
-    info_cols = st.columns(3)
-    with info_cols[0]:
-        if search_keywords:
-            st.markdown(f"**🔑 Keywords ({len(search_keywords)})**")
-            st.caption(", ".join(search_keywords[:10]))
-    with info_cols[1]:
-        if data_fields:
-            st.markdown(f"**📊 Data Fields ({len(data_fields)})**")
-            st.caption(", ".join(data_fields[:12]))
-    with info_cols[2]:
-        if target_sources:
-            st.markdown(f"**🌐 Sources ({len(target_sources)})**")
-            st.caption(", ".join(target_sources[:8]))
-
-    # Dynamic field groups preview
-    if field_groups:
-        st.markdown(f"#### 🔬 Research Groups ({len(field_groups)} dynamic categories)")
-        for g in field_groups:
-            gname = g.get("group_name", "?")
-            gfields = g.get("fields", [])
-            gprompt = g.get("research_prompt", "")
-            with st.expander(f"**{gname}** — {', '.join(gfields[:5])}"):
-                st.write(f"**Fields:** {', '.join(gfields)}")
-                st.write(f"**Research focus:** {gprompt[:300]}")
-
-    st.markdown("---")
+    _enhanced_preview(st.session_state["enhanced_data"], raw_requirement)
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -227,6 +348,25 @@ if start_btn:
         st.error("Describe what data you need.")
         st.stop()
 
+    # Heavy pipeline modules (openai, rapidfuzz, xlsxwriter) load only once a
+    # search starts, so idle reruns and first paint skip them.
+    from src.ai_agent import deduplicate_by_name, unmatched_records, NORM_KEY
+    from src.serp_search import enrich_with_place_details, clear_cache as clear_serp_cache
+    from src.perplexity_research import (
+        research_businesses,
+        research_field_group,
+        research_combined_field_groups,
+    )
+    from src.excel_exporter import export_to_excel
+
+    if refresh_serp:
+        for cached in (_cached_serp_multiple, _cached_google_web, _cached_yelp, _cached_google_local):
+            cached.clear()
+        clear_serp_cache()
+
+    # Tracking fields used while merging, never exported
+    INTERNAL_FIELDS = frozenset({"Data ID", "Place ID", "Thumbnail", NORM_KEY})
+
     t_start = time.time()
     serp_records = []
     web_search_results = []
@@ -247,7 +387,7 @@ if start_btn:
     else:
         with st.status("✨ Step 0: Auto-enhancing with RCAFT...", expanded=True) as status:
             try:
-                edata = enhance_prompt(openai_key, raw_requirement)
+                edata = _cached_enhance(openai_key, raw_requirement)
                 requirement = edata.get("enhanced_prompt", raw_requirement)
                 search_keywords = edata.get("search_keywords", [])
                 data_fields = edata.get("data_fields", [])
@@ -282,7 +422,10 @@ if start_btn:
     # ══════════════════════════════════════════════════════════════════
     with st.status("🧠 Step 1: AI generating search queries...", expanded=True) as status:
         try:
-            loc = generate_location_info(openai_key, requirement)
+            try:
+                loc = _cached_location(openai_key, requirement)
+            except ValueError:
+                loc = {}
             lat = loc.get("latitude")
             lng = loc.get("longitude")
             city = loc.get("city", "")
@@ -290,15 +433,20 @@ if start_btn:
             if lat and lng:
                 st.write(f"📍 **{city}** ({lat}, {lng})")
 
-            maps_queries = generate_maps_queries(
-                openai_key, requirement, search_keywords, city, num_queries=num_maps_queries
-            )
+            # Both query sets only need the city, so generate them side by side
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                maps_q_future = pool.submit(
+                    _cached_maps_queries, openai_key, requirement, search_keywords, city, num_maps_queries
+                )
+                web_q_future = pool.submit(
+                    _cached_web_queries,
+                    openai_key, requirement, search_keywords, city, target_sources, num_web_queries,
+                )
+            maps_queries = maps_q_future.result()
+            web_queries = web_q_future.result()
+
             for i, q in enumerate(maps_queries, 1):
                 st.write(f"  🗺️ {i}. `{q}`")
-
-            web_queries = generate_web_search_queries(
-                openai_key, requirement, search_keywords, city, target_sources, num_queries=num_web_queries
-            )
             for i, q in enumerate(web_queries, 1):
                 st.write(f"  🌐 {i}. `{q}`")
 
@@ -307,15 +455,34 @@ if start_btn:
             st.error(f"Query generation failed: {e}")
             st.stop()
 
+    # Steps 2, 4, 5 and 6a are independent round-trips — start them all at
+    # once, then render each status block in order from the main thread.
+    serp_pool = ThreadPoolExecutor(max_workers=5)
+    maps_future = serp_pool.submit(
+        _cached_serp_multiple, serpapi_key, tuple(maps_queries), results_per_query, lat, lng,
+    )
+    web_future = serp_pool.submit(_cached_google_web, serpapi_key, tuple(web_queries), city, 10)
+    yelp_future = (
+        serp_pool.submit(_cached_yelp, serpapi_key, maps_queries[0], yelp_loc)
+        if search_yelp_too and yelp_loc and maps_queries else None
+    )
+    local_futures = (
+        [serp_pool.submit(_cached_google_local, serpapi_key, q, city) for q in maps_queries[:2]]
+        if search_google_local_too else []
+    )
+    # Discovery works off the requirement alone; known names are filtered out when it lands
+    discovery_future = (
+        serp_pool.submit(research_businesses, perplexity_key, requirement, data_fields=data_fields)
+        if use_perplexity and perplexity_key and pplx_discover else None
+    )
+    serp_pool.shutdown(wait=False)
+
     # ══════════════════════════════════════════════════════════════════
     # STEP 2: SerpAPI Google Maps
     # ══════════════════════════════════════════════════════════════════
     with st.status("🗺️ Step 2: Google Maps listings...", expanded=True) as status:
         try:
-            serp_records = search_serp_multiple(
-                maps_queries, serpapi_key, results_per_query=results_per_query,
-                lat=lat, lng=lng,
-            )
+            serp_records = maps_future.result()
             st.write(f"**{len(serp_records)} unique businesses from Google Maps**")
             if serp_records:
                 st.write("Preview: " + ", ".join(r.get("Name", "?") for r in serp_records[:8]) + "...")
@@ -349,9 +516,7 @@ if start_btn:
     # ══════════════════════════════════════════════════════════════════
     with st.status("🌐 Step 4: Searching directories & review sites...", expanded=True) as status:
         try:
-            web_search_results = search_google_web(
-                web_queries, serpapi_key, location=city, results_per_query=10,
-            )
+            web_search_results = web_future.result()
             st.write(f"**{len(web_search_results)} third-party pages found**")
             for r in web_search_results[:5]:
                 st.write(f"  • [{r.get('Source Domain', '')}] {r.get('Title', '')[:70]}")
@@ -362,10 +527,10 @@ if start_btn:
     # ══════════════════════════════════════════════════════════════════
     # STEP 5: Yelp + Local (optional)
     # ══════════════════════════════════════════════════════════════════
-    if search_yelp_too and yelp_loc:
+    if yelp_future:
         with st.status("🔎 Step 5a: Yelp...", expanded=True) as status:
             try:
-                yelp_records = search_yelp(maps_queries[0], serpapi_key, location=yelp_loc)
+                yelp_records = yelp_future.result()
                 st.write(f"**{len(yelp_records)} from Yelp**")
                 status.update(label=f"✅ {len(yelp_records)} from Yelp", state="complete")
             except Exception as e:
@@ -374,17 +539,25 @@ if start_btn:
     if search_google_local_too:
         with st.status("📍 Step 5b: Local Pack...", expanded=True) as status:
             try:
-                for q in maps_queries[:2]:
-                    local_records.extend(search_google_local(q, serpapi_key, location=city))
+                for future in local_futures:
+                    local_records.extend(future.result())
                 st.write(f"**{len(local_records)} from Local Pack**")
                 status.update(label=f"✅ {len(local_records)} from Local", state="complete")
             except Exception as e:
                 st.warning(f"Local failed: {e}")
 
+    # Merge the SerpAPI sources now; Perplexity results fold in as each one lands
+    merged_records = []
+    for records in (serp_records, yelp_records, local_records):
+        merged_records = _merge_into(merged_records, records)
+
     # ══════════════════════════════════════════════════════════════════
     # STEP 6: Perplexity — Dynamic Research
     # ══════════════════════════════════════════════════════════════════
-    all_names = [r.get("Name", "") for r in serp_records + yelp_records + local_records if r.get("Name")]
+    # Ordered de-dup in one pass, so prompts built from these names stay stable across runs
+    all_names = list(dict.fromkeys(
+        r["Name"] for r in chain(serp_records, yelp_records, local_records) if r.get("Name")
+    ))
 
     # Build web context for Perplexity
     web_context = ""
@@ -396,11 +569,15 @@ if start_btn:
 
     if use_perplexity and perplexity_key:
         # 6a: Discover additional businesses
-        if pplx_discover:
+        if discovery_future:
             with st.status("🔬 Step 6a: Discovering additional businesses...", expanded=True) as status:
                 try:
-                    pplx_base_records = research_businesses(
-                        perplexity_key, pplx_req, data_fields=data_fields, existing_names=all_names
+                    discovered = discovery_future.result()
+                    # Already-known businesses still fill gaps; only new ones count as additional
+                    merged_records = _merge_into(merged_records, discovered)
+                    # Fuzzy, like the merge: "The Lotus Spa - Hyd" is not new next to "Lotus Spa"
+                    pplx_base_records = unmatched_records(
+                        discovered, list(chain(serp_records, yelp_records, local_records))
                     )
                     st.write(f"**+{len(pplx_base_records)} additional businesses**")
                     status.update(label=f"✅ +{len(pplx_base_records)} discovered", state="complete")
@@ -408,84 +585,88 @@ if start_btn:
                     st.warning(f"Discovery failed: {e}")
 
         # Collect all names for enrichment
-        all_names_for_enrichment = list(set(
-            all_names + [r.get("Name", "") for r in pplx_base_records if r.get("Name")]
-        ))
+        all_names_for_enrichment = list(dict.fromkeys(chain(
+            all_names, (r["Name"] for r in pplx_base_records if r.get("Name"))
+        )))
+
+        # 6b: Dynamic field group enrichment, all groups in one call per batch
+        if pplx_enrich and pplx_combine and field_groups and all_names_for_enrichment:
+            gnames = [g.get("group_name", f"Group {i+1}") for i, g in enumerate(field_groups) if g.get("fields")]
+            with st.status(
+                f"📊 Step 6b: {len(gnames)} categories in one pass ({len(all_names_for_enrichment)} businesses)...",
+                expanded=True
+            ) as status:
+                try:
+                    records = research_combined_field_groups(
+                        perplexity_key, pplx_req, all_names_for_enrichment, field_groups,
+                    )
+                    pplx_group_records["Combined"] = records
+                    merged_records = _merge_into(merged_records, records)
+                    st.write(f"**{', '.join(gnames)}: data for {len(records)} businesses**")
+                    status.update(label=f"✅ Combined research: {len(records)} records", state="complete")
+                except Exception as e:
+                    st.warning(f"Combined research failed: {e}")
+                    pplx_group_records["Combined"] = []
 
-        # 6b: Dynamic field group enrichment
-        if pplx_enrich and field_groups and all_names_for_enrichment:
+        # 6b: Dynamic field group enrichment, one call per group
+        elif pplx_enrich and field_groups and all_names_for_enrichment:
             st.markdown(f"#### 🔬 Researching {len(field_groups)} dynamic categories...")
 
-            for idx, group in enumerate(field_groups):
-                gname = group.get("group_name", f"Group {idx+1}")
-                gfields = group.get("fields", [])
-                gprompt = group.get("research_prompt", "")
-
-                if not gfields:
-                    continue
-
-                with st.status(
-                    f"📊 Step 6.{idx+2}: {gname} ({len(all_names_for_enrichment)} businesses)...",
-                    expanded=True
-                ) as status:
-                    try:
-                        from src.perplexity_research import research_field_group
-                        records = research_field_group(
-                            perplexity_key, pplx_req, all_names_for_enrichment,
-                            gname, gfields, gprompt,
-                        )
-                        pplx_group_records[gname] = records
-                        st.write(f"**{gname}: data for {len(records)} businesses**")
-                        st.write(f"Fields: {', '.join(gfields[:6])}")
-                        status.update(label=f"✅ {gname}: {len(records)} records", state="complete")
-                    except Exception as e:
-                        st.warning(f"{gname} failed: {e}")
-                        pplx_group_records[gname] = []
+            # Groups are independent Perplexity round-trips — run them concurrently,
+            # then render each status block in order from the main thread.
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                group_futures = {}
+                for idx, group in enumerate(field_groups):
+                    gname = group.get("group_name", f"Group {idx+1}")
+                    gfields = group.get("fields", [])
+                    gprompt = group.get("research_prompt", "")
+
+                    if not gfields:
+                        continue
+
+                    group_futures[idx] = (gname, gfields, pool.submit(
+                        research_field_group,
+                        perplexity_key, pplx_req, all_names_for_enrichment,
+                        gname, gfields, gprompt,
+                    ))
+
+                for idx, (gname, gfields, future) in group_futures.items():
+                    with st.status(
+                        f"📊 Step 6.{idx+2}: {gname} ({len(all_names_for_enrichment)} businesses)...",
+                        expanded=True
+                    ) as status:
+                        try:
+                            records = future.result()
+                            pplx_group_records[gname] = records
+                            # Later groups are still in flight while this one merges
+                            merged_records = _merge_into(merged_records, records)
+                            st.write(f"**{gname}: data for {len(records)} businesses**")
+                            st.write(f"Fields: {', '.join(gfields[:6])}")
+                            status.update(label=f"✅ {gname}: {len(records)} records", state="complete")
+                        except Exception as e:
+                            st.warning(f"{gname} failed: {e}")
+                            pplx_group_records[gname] = []
 
     # ══════════════════════════════════════════════════════════════════
     # STEP 7: Fuzzy merge + Excel
     # ══════════════════════════════════════════════════════════════════
     with st.status("🔀 Step 7: Merging all data...", expanded=True) as status:
-        primary = serp_records if serp_records else []
-
-        # Flatten all Perplexity group results into secondary lists
-        secondary_lists = [s for s in [yelp_records, local_records, pplx_base_records] if s]
-        for gname, grecords in pplx_group_records.items():
-            if grecords:
-                secondary_lists.append(grecords)
-
-        if primary or secondary_lists:
-            if primary:
-                final_records = fuzzy_merge_records(primary, *secondary_lists)
-            else:
-                all_lists = secondary_lists
-                final_records = fuzzy_merge_records(all_lists[0], *all_lists[1:]) if all_lists else []
-        else:
-            final_records = []
-
+        final_records = merged_records
         before_dedup = len(final_records)
         final_records = deduplicate_by_name(final_records)
 
         # Remove internal tracking fields
-        for r in final_records:
-            r.pop("Data ID", None)
-            r.pop("Place ID", None)
-            r.pop("Thumbnail", None)
+        final_records = [{k: v for k, v in r.items() if k not in INTERNAL_FIELDS} for r in final_records]
 
         st.write(f"**{before_dedup} → {len(final_records)} unique records**")
 
-        source_counts = {}
-        for r in final_records:
-            src = r.get("Data Source", "Unknown")
-            source_counts[src] = source_counts.get(src, 0) + 1
+        source_counts = Counter(r.get("Data Source", "Unknown") for r in final_records)
         for src, cnt in source_counts.items():
             st.write(f"  • {src}: {cnt}")
 
         # Show field coverage
         if final_records:
-            all_fields = set()
-            for r in final_records:
-                all_fields.update(r.keys())
+            all_fields = set().union(*final_records)
             st.write(f"  • **{len(all_fields)} total fields** collected across all records")
 
         status.update(label=f"✅ {len(final_records)} records merged", state="complete")
@@ -496,7 +677,7 @@ if start_btn:
 
     with st.status("📊 Exporting to Excel...", expanded=True) as status:
         try:
-            filepath = export_to_excel(final_records, raw_requirement)
+            filepath, excel_bytes = export_to_excel(final_records, raw_requirement)
             st.success(f"`{filepath}`")
             status.update(label="✅ Excel ready", state="complete")
         except Exception as e:
@@ -524,46 +705,30 @@ if start_btn:
 
     # Data preview
     st.markdown("### Data Preview")
-    df = pd.DataFrame(final_records).astype(str).replace("None", "")
+    df = _records_frame(final_records)
     st.dataframe(df, width="stretch", height=450)
 
     # Column completeness
     st.markdown("### Column Completeness")
-    completeness = {}
-    for col in df.columns:
-        filled = df[col].notna().sum() - (df[col] == "").sum()
-        completeness[col] = f"{filled}/{len(df)} ({filled/len(df)*100:.0f}%)" if len(df) > 0 else "0"
+    total = len(df)
+    if total:
+        filled = (df.notna() & df.ne("")).sum(axis=0)
+        completeness = {col: f"{n}/{total} ({n/total*100:.0f}%)" for col, n in filled.items()}
+    else:
+        completeness = {col: "0" for col in df.columns}
     st.dataframe(pd.DataFrame([completeness]), width="stretch")
 
-    # Download
-    with open(filepath, "rb") as f:
-        st.download_button(
-            label="⬇️ Download Excel", data=f.read(),
-            file_name=filepath.split("/")[-1],
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            type="primary", width="stretch",
-        )
+    # Download — "ignore" keeps this run's output on screen instead of rerunning the script
+    st.download_button(
+        label="⬇️ Download Excel", data=excel_bytes,
+        file_name=filepath.split("/")[-1],
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        type="primary", width="stretch", on_click="ignore",
+    )
 
-    st.session_state["result_records"] = final_records
+    # Only the path is kept; the previous-results view reloads from the exported file
     st.session_state["result_filepath"] = filepath
 
 # ── Previous results ──
-elif "result_records" in st.session_state:
-    records = st.session_state["result_records"]
-    filepath = st.session_state.get("result_filepath", "")
-
-    st.info(f"Previous run — **{len(records)} records**")
-    df = pd.DataFrame(records).astype(str).replace("None", "")
-    st.dataframe(df, width="stretch", height=400)
-
-    if filepath:
-        try:
-            with open(filepath, "rb") as f:
-                st.download_button(
-                    label="⬇️ Download Excel", data=f.read(),
-                    file_name=filepath.split("/")[-1],
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    type="primary", width="stretch",
-                )
-        except FileNotFoundError:
-            st.warning("File not found. Run a new scrape.")
+elif st.session_state.get("result_filepath"):
+    _previous_results(st.session_state["result_filepath"])
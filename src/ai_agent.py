@@ -5,43 +5,59 @@ deterministic fuzzy merge.
 
 import json
 import re
+from functools import lru_cache
+import numpy as np
+import orjson
 from openai import OpenAI
-from thefuzz import fuzz
+from rapidfuzz import fuzz, process, utils
 
 from src.config import OPENAI_MODEL
+from src.json_scan import balanced_spans
+from src.llm_cache import cached_response
 
 
+@lru_cache(maxsize=None)
 def _client(api_key: str) -> OpenAI:
+    """One client per key for the process, so its connection pool survives reruns."""
     return OpenAI(api_key=api_key)
 
 
 def _chat(client: OpenAI, system: str, user: str, model: str = OPENAI_MODEL, temperature: float = 0.2) -> str:
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=temperature,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-    )
-    return resp.choices[0].message.content.strip()
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+    def _create() -> str:
+        resp = client.chat.completions.create(model=model, temperature=temperature, messages=messages)
+        return resp.choices[0].message.content.strip()
+
+    return cached_response({"model": model, "temperature": temperature, "messages": messages}, _create)
+
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)```")
 
 
 def _extract_json(text: str):
-    fence = re.search(r"```(?:json)?\s*([\s\S]*?)```", text)
+    # Bare JSON is the common reply; parse it before scanning for a fence
+    if text[:1] in ("[", "{"):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    fence = _FENCE_RE.search(text)
     if fence:
         text = fence.group(1).strip()
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         pass
-    for sc, ec in [("[", "]"), ("{", "}")]:
-        s = text.find(sc)
-        e = text.rfind(ec)
-        if s != -1 and e != -1 and e > s:
+    for sc in "[{":
+        # Longest first, so an aside like "[2024]" doesn't beat the real payload
+        for span in sorted(balanced_spans(text, sc), key=len, reverse=True):
             try:
-                return json.loads(text[s : e + 1])
-            except json.JSONDecodeError:
+                return orjson.loads(span)
+            except orjson.JSONDecodeError:
                 continue
     raise ValueError(f"Could not extract JSON:\n{text[:500]}")
 
@@ -107,12 +123,8 @@ def generate_web_search_queries(
         f"Location: {location}\n"
         f"Target sources: {sources_str}\n"
         f"Keywords: {keywords_str}\n\n"
-        f"Generate exactly {num_queries} Google web search queries that will find:\n"
-        "1. Directory listings with detailed business profiles\n"
-        "2. Review pages with ratings, comments, and details\n"
-        "3. Blog/article pages that list and compare businesses\n"
-        "4. Third-party sites with data like pricing, amenities, staff info\n"
-        "5. Any source with information NOT on the business's own website"
+        f"Generate exactly {num_queries} queries spread across the source types above, "
+        "favouring pages with details like pricing, amenities and staff."
     )
     client = _client(api_key)
     raw = _chat(client, system, user)
@@ -149,17 +161,83 @@ def _get_name(record: dict) -> str:
     return ""
 
 
+_SUFFIX_RE = re.compile(r'\s*[-–,]\s*\w+$')
+_SPACES_RE = re.compile(r'\s+')
+
+
 def _normalize_name(name: str) -> str:
     """Normalize a business name for matching. Domain-agnostic."""
-    import re as _re
     name = name.lower().strip()
     # Remove common location/city suffixes (generic pattern)
-    name = _re.sub(r'\s*[-–,]\s*\w+$', '', name)
+    name = _SUFFIX_RE.sub('', name)
     # Remove extra whitespace
-    name = _re.sub(r'\s+', ' ', name)
+    name = _SPACES_RE.sub(' ', name)
     return name.strip()
 
 
+# Record field holding the precomputed match key (see add_match_keys)
+NORM_KEY = "_norm_name"
+
+
+def _compute_match_key(record: dict) -> str | None:
+    name = _normalize_name(_get_name(record))
+    if not name:
+        return None
+    # Tokens sorted once here, so a plain ratio on two keys equals token_sort_ratio on the names
+    return " ".join(sorted(utils.default_process(name).split()))
+
+
+def _match_key(record: dict) -> str | None:
+    """Normalized, token-sorted name for fuzzy scoring. None if the record has no name."""
+    if NORM_KEY in record:
+        return record[NORM_KEY]
+    return _compute_match_key(record)
+
+
+def add_match_keys(records: list[dict]) -> list[dict]:
+    """Stamp each record with its match key once, so merge and dedup don't re-normalize."""
+    for r in records:
+        r[NORM_KEY] = _compute_match_key(r)
+    return records
+
+
+def _cutoff(threshold: int) -> float:
+    """
+    Lowest raw score that still rounds up to threshold. rapidfuzz applies the
+    cutoff to the raw float and only then rounds it half up into the int/uint8
+    result, so every raw score >= threshold - 0.5 survives and rounds to at least
+    threshold, and every one below it would have rounded under threshold anyway.
+    Cut pairs score 0, which lets rapidfuzz stop early without changing any
+    >= threshold decision.
+    """
+    return max(threshold - 0.5, 0)
+
+
+def _score_matrix(queries: list[str], choices: list[str | None], threshold: int = 0):
+    """token_sort_ratio for every query/choice pair (keys are pre-sorted, so plain ratio),
+    rounded half up to ints — thefuzz rounded half to even, so an exact .5 score
+    can land one higher than it did there. Nameless (None) choices score 0, as do
+    pairs that can't reach threshold."""
+    scores = process.cdist(
+        queries, [c or "" for c in choices], scorer=fuzz.ratio, dtype=np.int32, workers=-1,
+        score_cutoff=_cutoff(threshold),
+    )
+    scores[:, [c is None for c in choices]] = 0
+    return scores
+
+
+def _fill_gaps(target: dict, source: dict) -> dict:
+    """Copy source's non-empty values into target's empty fields, in place."""
+    for k, v in source.items():
+        if k == NORM_KEY:
+            continue
+        if v is not None and str(v).strip():
+            existing = target.get(k)
+            if not existing or not str(existing).strip():
+                target[k] = v
+    return target
+
+
 def fuzzy_merge_records(
     primary: list[dict],
     *secondary_lists: list[dict],
@@ -170,58 +248,126 @@ def fuzzy_merge_records(
     Primary records are the base. Secondary fills gaps or appends new ones.
     No data lost. No LLM. Deterministic.
     """
-    merged = [dict(r) for r in primary]
-    merged_names = [_normalize_name(_get_name(r)) for r in merged]
+    # Records are shared with the inputs and copied only when a gap gets filled
+    merged = list(primary)
+    merged_names = [_match_key(r) for r in merged]
+    owned = set()  # indices in merged that are private copies
 
     for secondary in secondary_lists:
-        for sec_record in secondary:
-            sec_name = _normalize_name(_get_name(sec_record))
-            if not sec_name:
-                merged.append(dict(sec_record))
-                merged_names.append("")
+        sec_names = [_match_key(r) for r in secondary]
+        # Score the whole list against everything merged so far in one C call
+        base_count = len(merged_names)
+        scores = _score_matrix([n or "" for n in sec_names], merged_names, match_threshold)
+
+        for row, (sec_record, sec_name) in enumerate(zip(secondary, sec_names)):
+            if sec_name is None:
+                merged.append(sec_record)
+                merged_names.append(None)
                 continue
 
             best_score = 0
             best_idx = -1
-            for i, m_name in enumerate(merged_names):
-                if not m_name:
-                    continue
-                score = fuzz.token_sort_ratio(sec_name, m_name)
-                if score > best_score:
-                    best_score = score
-                    best_idx = i
-
-            if best_score >= match_threshold and best_idx >= 0:
-                for k, v in sec_record.items():
-                    if v is not None and str(v).strip():
-                        existing = merged[best_idx].get(k)
-                        if not existing or not str(existing).strip():
-                            merged[best_idx][k] = v
+            if base_count:
+                best_idx = int(scores[row].argmax())
+                best_score = int(scores[row, best_idx])
+            # Records appended from this same list aren't in the matrix yet
+            if len(merged_names) > base_count:
+                extra = _score_matrix([sec_name], merged_names[base_count:], match_threshold)[0]
+                extra_idx = int(extra.argmax())
+                if extra[extra_idx] > best_score:
+                    best_score, best_idx = int(extra[extra_idx]), base_count + extra_idx
+
+            if best_score >= match_threshold and best_score > 0 and best_idx >= 0:
+                if best_idx not in owned:
+                    merged[best_idx] = dict(merged[best_idx])
+                    owned.add(best_idx)
+                _fill_gaps(merged[best_idx], sec_record)
             else:
-                merged.append(dict(sec_record))
+                merged.append(sec_record)
                 merged_names.append(sec_name)
 
     return merged
 
 
+def unmatched_records(records: list[dict], known: list[dict], match_threshold: int = 70) -> list[dict]:
+    """
+    Records whose name matches none of known, scored the way fuzzy_merge_records
+    matches — the ones a merge would append rather than fold in.
+    Nameless records count as unmatched.
+    """
+    keys = [_match_key(r) for r in records]
+    known_keys = [_match_key(r) for r in known]
+    if not any(k is not None for k in known_keys):
+        return list(records)
+    best = _score_matrix([k or "" for k in keys], known_keys, match_threshold).max(axis=1)
+    return [r for r, k, score in zip(records, keys, best) if k is None or score < match_threshold]
+
+
+def _first_kept_match(keys: list[str], threshold: int, block_size: int = 512) -> np.ndarray:
+    """
+    Greedy dedup: for each key, the index of the earliest kept key it matches,
+    or -1 if it is kept itself. Keys are scored a block at a time against the
+    keys kept so far plus their own block — never the full N x N matrix.
+    """
+    targets = np.full(len(keys), -1, dtype=np.intp)
+    kept = []  # indices of kept keys, in order
+
+    for start in range(0, len(keys), block_size):
+        block = keys[start:start + block_size]
+        vs_kept = None
+        if kept:
+            vs_kept = process.cdist(
+                block, [keys[k] for k in kept], scorer=fuzz.ratio, dtype=np.uint8, workers=-1,
+                score_cutoff=_cutoff(threshold),
+            ) >= threshold
+        within = process.cdist(
+            block, block, scorer=fuzz.ratio, dtype=np.uint8, workers=-1, score_cutoff=_cutoff(threshold),
+        ) >= threshold
+        block_kept = np.zeros(len(block), dtype=bool)
+
+        for j in range(len(block)):
+            # Earlier blocks' kept keys come first, so check them before this block's
+            if vs_kept is not None:
+                hits = np.flatnonzero(vs_kept[j])
+                if hits.size:
+                    targets[start + j] = kept[hits[0]]
+                    continue
+            hits = np.flatnonzero(block_kept[:j] & within[j, :j])
+            if hits.size:
+                targets[start + j] = start + hits[0]
+            else:
+                block_kept[j] = True
+
+        kept.extend(start + int(j) for j in np.flatnonzero(block_kept))
+
+    return targets
+
+
 def deduplicate_by_name(records: list[dict], threshold: int = 85) -> list[dict]:
-    result = []
-    seen_names = []
+    """
+    Drop records whose name matches an earlier kept record.
+    The duplicate's non-empty fields fill gaps in the record it matched.
+    """
+    keys = [_match_key(r) for r in records]
+    named = [i for i, k in enumerate(keys) if k is not None]
+    row_of = {i: row for row, i in enumerate(named)}
+    named_keys = [keys[i] for i in named]
+    # Matches are decided on score arrays; only field filling walks dicts
+    targets = _first_kept_match(named_keys, threshold)
+    slot = {}  # kept row -> index in result
 
-    for record in records:
-        name = _normalize_name(_get_name(record))
-        if not name:
+    result = []
+    for i, record in enumerate(records):
+        if keys[i] is None:
             result.append(record)
             continue
 
-        is_dup = False
-        for existing_name in seen_names:
-            if fuzz.token_sort_ratio(name, existing_name) >= threshold:
-                is_dup = True
-                break
-
-        if not is_dup:
+        row = row_of[i]
+        if targets[row] >= 0:
+            target = slot[int(targets[row])]
+            result[target] = _fill_gaps(dict(result[target]), record)
+        else:
+            slot[row] = len(result)
             result.append(record)
-            seen_names.append(name)
 
     return result
@@ -12,3 +12,8 @@ PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY", "")
 
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Local LLM response cache (dev) — see src/llm_cache.py
+LLM_CACHE = os.getenv("LLM_CACHE", "") == "1"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 86400)))
+LLM_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache.sqlite")
@@ -1,23 +1,46 @@
 """Simple Excel export – just push data to a sheet, no fancy formatting."""
 
+import io
+import math
 import os
 from datetime import datetime
-import pandas as pd
+import xlsxwriter
 from src.config import OUTPUT_DIR
 
 
-def export_to_excel(records: list[dict], requirement: str = "", filename: str | None = None) -> str:
-    """Export records to Excel. Simple. Just data."""
+def _cell(value):
+    """Excel-writable value: blank for missing/NaN, text for nested JSON (lists, dicts)."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (str, bool, int)) or (isinstance(value, float) and math.isfinite(value)):
+        return value
+    return str(value)
+
+
+def export_to_excel(records: list[dict], requirement: str = "", filename: str | None = None) -> tuple[str, bytes]:
+    """Export records to Excel. Simple. Just data. Returns (filepath, file bytes)."""
     if not filename:
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_req = "".join(c if c.isalnum() or c in " _-" else "" for c in requirement[:40]).strip().replace(" ", "_")
         filename = f"data_{safe_req}_{ts}.xlsx"
 
     filepath = os.path.join(OUTPUT_DIR, filename)
-    df = pd.DataFrame(records)
-
-    if df.empty:
-        df = pd.DataFrame(columns=["No Data Found"])
+    # Every field seen, in first-seen order
+    columns = list(dict.fromkeys(k for r in records for k in r))
+    if not columns:
+        columns, records = ["No Data Found"], []
 
-    df.to_excel(filepath, index=False, engine="openpyxl")
-    return filepath
+    # Build the workbook in memory once; the same bytes go to disk and to the download button.
+    # constant_memory flushes each row as soon as the next one starts, so rows are streamed
+    # straight from the records, strictly top to bottom — no intermediate DataFrame.
+    buf = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buf, {"constant_memory": True, "strings_to_urls": False})
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, columns)
+    for row_idx, record in enumerate(records, start=1):
+        sheet.write_row(row_idx, 0, [_cell(record.get(c)) for c in columns])
+    workbook.close()
+    data = buf.getvalue()
+    with open(filepath, "wb") as f:
+        f.write(data)
+    return filepath, data
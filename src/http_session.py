@@ -0,0 +1,25 @@
+"""Shared HTTP session — one keep-alive connection pool for all SerpAPI calls."""
+
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+@lru_cache(maxsize=None)
+def get_session() -> requests.Session:
+    """
+    Process-wide session. Module state outlives Streamlit reruns, so every
+    run reuses the same pooled connections instead of a new TLS handshake per call.
+    """
+    # Exponential backoff on rate limits and gateway errors; Retry-After wins when sent
+    retry = Retry(
+        total=3, backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,41 @@
+"""Locate JSON inside LLM replies that wrap it in prose."""
+
+import re
+
+_STRUCTURAL_RE = re.compile(r'[\[\]{}"\\]')
+
+
+def balanced_spans(text: str, opener: str) -> list[str]:
+    """
+    Every outermost span that starts with opener ("[" or "{") and whose brackets
+    balance, in order. One pass with a stack of open brackets: a bracket that
+    never closes (a stray one in prose) stays on the stack without hiding the
+    spans after it. Brackets inside JSON strings are skipped, so "Rooms [A-C]"
+    can't end a span early.
+    """
+    closer = "]" if opener == "[" else "}"
+    stack: list[tuple[int, str]] = []  # (index, bracket) still open
+    spans: list[tuple[int, int]] = []  # closed opener spans not nested in a later one
+    in_str = False
+    escaped_at = -1
+    for m in _STRUCTURAL_RE.finditer(text):
+        i, c = m.start(), m.group()
+        if in_str:
+            if i == escaped_at:
+                continue
+            if c == "\\":
+                escaped_at = i + 1
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            # Quotes only open strings inside a bracket; prose quotes are ignored
+            in_str = bool(stack)
+        elif c in "[{":
+            stack.append((i, c))
+        elif c in "]}" and stack:
+            start, open_c = stack.pop()
+            if open_c == opener and c == closer:
+                while spans and spans[-1][0] > start:
+                    spans.pop()
+                spans.append((start, i))
+    return [text[s : e + 1] for s, e in spans]
@@ -0,0 +1,49 @@
+"""
+Local LLM response cache — opt-in (LLM_CACHE=1), for replaying the same
+requirement during development without paying for the round-trip again.
+Responses are stored in SQLite, keyed by a hash of the full request.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from threading import Lock
+from typing import Callable
+
+from src.config import LLM_CACHE, LLM_CACHE_PATH, LLM_CACHE_TTL
+
+_lock = Lock()
+_conn: sqlite3.Connection | None = None
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created REAL, body TEXT)"
+        )
+    return _conn
+
+
+def cached_response(request: dict, compute: Callable[[], str]) -> str:
+    """
+    Return the cached response for this request, or run compute() and store it.
+    request must hold everything that affects the output (model, messages, temperature).
+    """
+    if not LLM_CACHE:
+        return compute()
+
+    key = hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+    with _lock:
+        row = _db().execute("SELECT created, body FROM responses WHERE key = ?", (key,)).fetchone()
+    if row and time.time() - row[0] < LLM_CACHE_TTL:
+        return row[1]
+
+    body = compute()
+    with _lock:
+        db = _db()
+        db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, time.time(), body))
+        db.commit()
+    return body
@@ -3,44 +3,74 @@ Perplexity AI module — fully dynamic research using sonar-pro.
 No hardcoded fields. Research prompts come from RCAFT field_groups.
 """
 
-import json
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from threading import BoundedSemaphore
+
+import orjson
 from openai import OpenAI
 
+from src.ai_agent import _compute_match_key, _score_matrix
+from src.json_scan import balanced_spans
+from src.llm_cache import cached_response
+
+# Groups and their name batches all fan out at once; cap in-flight requests
+# process-wide so a big run stays under Perplexity's rate limit.
+MAX_CONCURRENT_CALLS = 8
+_call_slots = BoundedSemaphore(MAX_CONCURRENT_CALLS)
+
 
+# The SDK already retries 429s, 5xx and dropped connections with jittered
+# backoff that honors Retry-After; a wide fan-out needs a few more attempts
+# than its default 2 before one batch fails the group.
+MAX_RETRIES = 4
+
+
+@lru_cache(maxsize=None)
 def _client(api_key: str) -> OpenAI:
-    return OpenAI(api_key=api_key, base_url="https://api.perplexity.ai")
+    return OpenAI(api_key=api_key, base_url="https://api.perplexity.ai", max_retries=MAX_RETRIES)
+
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)```")
 
 
 def _extract_json(text: str):
-    fence = re.search(r"```(?:json)?\s*([\s\S]*?)```", text)
+    # Bare JSON is the common reply; parse it before scanning for a fence
+    if text[:1] in ("[", "{"):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    fence = _FENCE_RE.search(text)
     if fence:
         text = fence.group(1).strip()
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         pass
-    for sc, ec in [("[", "]"), ("{", "}")]:
-        s = text.find(sc)
-        e = text.rfind(ec)
-        if s != -1 and e != -1 and e > s:
+    for sc in "[{":
+        # Longest first, so an aside like "[2024]" doesn't beat the real payload
+        for span in sorted(balanced_spans(text, sc), key=len, reverse=True):
             try:
-                return json.loads(text[s : e + 1])
-            except json.JSONDecodeError:
+                return orjson.loads(span)
+            except orjson.JSONDecodeError:
                 continue
     return None
 
 
 def _call_perplexity(client: OpenAI, system: str, user: str, model: str = "sonar-pro") -> str:
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=0.1,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-    )
-    return resp.choices[0].message.content.strip()
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+    def _create() -> str:
+        with _call_slots:
+            resp = client.chat.completions.create(model=model, temperature=0.1, messages=messages)
+        return resp.choices[0].message.content.strip()
+
+    return cached_response({"provider": "perplexity", "model": model, "temperature": 0.1, "messages": messages}, _create)
 
 
 # ── 1. Discover businesses (dynamic) ────────────────────────────────
@@ -112,38 +142,43 @@ def research_field_group(
     group_name: str,
     fields: list[str],
     research_prompt: str,
+    batch_size: int = 12,
+    max_workers: int = 4,
 ) -> list[dict]:
     """
     Research a specific group of fields for a list of businesses.
     Fully dynamic — the fields and research prompt come from RCAFT.
+    Name batches are researched concurrently; results keep batch order.
     """
     client = _client(api_key)
     all_records = []
     fields_str = ", ".join(fields)
 
-    for batch in _batch_names(business_names, batch_size=12):
-        names_str = "\n".join(f"  {i+1}. {n}" for i, n in enumerate(batch))
+    system = (
+        f"You are a data researcher specializing in {group_name}.\n"
+        "You have real-time web search access. Look up REAL data for each business.\n"
+        "Return ONLY a valid JSON array of objects, one per business.\n"
+        f"Each object must have: id (the business's number in the list), Name (as listed), {fields_str}\n"
+        "Use null for unknown fields. Do NOT make up data.\n"
+        "Search directories, review sites, articles, social media — any public source."
+    )
 
-        system = (
-            f"You are a data researcher specializing in {group_name}.\n"
-            "You have real-time web search access. Look up REAL data for each business.\n"
-            "Return ONLY a valid JSON array of objects.\n"
-            f"Each object must have: Name, {fields_str}\n"
-            "Use null for unknown fields. Do NOT make up data.\n"
-            "Search directories, review sites, articles, social media — any public source."
-        )
+    def _research_batch(batch: list[str]) -> list[dict]:
+        names_str = "\n".join(f"  {i+1}. {n}" for i, n in enumerate(batch))
         user = (
             f"Context: {requirement}\n\n"
             f"Research task: {research_prompt}\n\n"
-            f"For each business below, find: {fields_str}\n\n"
-            f"Businesses:\n{names_str}\n\n"
-            f"Return a JSON array with Name + {fields_str} for each business."
+            f"Businesses:\n{names_str}"
         )
-
         raw = _call_perplexity(client, system, user)
         records = _extract_json(raw)
         if isinstance(records, list):
-            all_records.extend([r for r in records if isinstance(r, dict)])
+            return _attach_names([r for r in records if isinstance(r, dict)], batch)
+        return []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for records in pool.map(_research_batch, _batch_names(business_names, batch_size=batch_size)):
+            all_records.extend(records)
 
     return all_records
 
@@ -156,39 +191,109 @@ def research_all_field_groups(
     business_names: list[str],
     field_groups: list[dict],
     progress_callback=None,
+    max_workers: int = 4,
 ) -> dict[str, list[dict]]:
     """
     Research ALL field groups from RCAFT output.
-    Returns a dict: { group_name: [records] }
+    Groups run concurrently; progress_callback fires from the calling
+    thread as each one completes.
+    Returns a dict: { group_name: [records] } in field_groups order.
     """
-    results = {}
-
+    groups = []
     for i, group in enumerate(field_groups):
-        group_name = group.get("group_name", f"Group {i+1}")
         fields = group.get("fields", [])
-        research_prompt = group.get("research_prompt", "")
-
-        if not fields:
-            continue
+        if fields:
+            groups.append((group.get("group_name", f"Group {i+1}"), fields, group.get("research_prompt", "")))
 
-        if progress_callback:
-            progress_callback(i, len(field_groups), group_name)
+    results = {group_name: [] for group_name, _, _ in groups}
 
-        try:
-            records = research_field_group(
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(
+                research_field_group,
                 api_key, requirement, business_names,
                 group_name, fields, research_prompt,
-            )
-            results[group_name] = records
-        except Exception as e:
-            print(f"[Perplexity] Error researching '{group_name}': {e}")
-            results[group_name] = []
+            ): group_name
+            for group_name, fields, research_prompt in groups
+        }
+        for done, future in enumerate(as_completed(futures)):
+            group_name = futures[future]
+            if progress_callback:
+                progress_callback(done, len(groups), group_name)
+            try:
+                results[group_name] = future.result()
+            except Exception as e:
+                print(f"[Perplexity] Error researching '{group_name}': {e}")
 
     return results
 
 
+# ── 4. All field groups in one call ──────────────────────────────────
+
+def research_combined_field_groups(
+    api_key: str,
+    requirement: str,
+    business_names: list[str],
+    field_groups: list[dict],
+) -> list[dict]:
+    """
+    Research every field group with a single call per name batch.
+    Fewer round-trips and billed prompt tokens than one call per group,
+    at the cost of less depth per field.
+    """
+    groups = [g for g in field_groups if g.get("fields")]
+    if not groups:
+        return []
+
+    labels = [g.get("group_name", f"Group {i+1}") for i, g in enumerate(groups)]
+    fields = list(dict.fromkeys(f for g in groups for f in g["fields"]))
+    research_prompt = "\n".join(
+        f"- {label}: {g.get('research_prompt', '')}" for label, g in zip(labels, groups)
+    )
+    return research_field_group(
+        api_key, requirement, business_names,
+        ", ".join(labels), fields, research_prompt,
+    )
+
+
 # ── Helpers ──────────────────────────────────────────────────────────
 
+def _attach_names(records: list[dict], batch: list[str], match_threshold: int = 70) -> list[dict]:
+    """
+    Give each row the exact name it was sent, so results match the source
+    records. The echoed list number is used only when the returned Name agrees
+    with that entry; otherwise the row takes the batch name it matches best, or
+    keeps its own Name if it matches none. Rows without a Name are dropped.
+    """
+    ids = []
+    for r in records:
+        idx = r.pop("id", None)
+        try:
+            ids.append(0 if isinstance(idx, bool) else int(idx))
+        except (TypeError, ValueError):
+            ids.append(0)
+    if not records:
+        return []
+
+    keys = [_compute_match_key(r) for r in records]
+    batch_keys = [_compute_match_key({"Name": n}) for n in batch]
+    scores = _score_matrix([k or "" for k in keys], batch_keys, match_threshold)
+
+    named = []
+    for row, (r, key, idx) in enumerate(zip(records, keys, ids)):
+        if key is None:
+            continue
+        best = idx - 1 if 1 <= idx <= len(batch) and scores[row, idx - 1] >= match_threshold else -1
+        if best < 0:
+            best = int(scores[row].argmax())
+            if scores[row, best] < match_threshold:
+                best = -1
+        if best >= 0:
+            r = {"Name": batch[best], **{k: v for k, v in r.items() if k != "Name"}}
+        named.append(r)
+    return named
+
+
 def _batch_names(names: list[str], batch_size: int = 12):
     for i in range(0, len(names), batch_size):
         yield names[i : i + batch_size]
@@ -6,17 +6,45 @@ Fully dynamic: works for ANY business type or search scenario.
 The AI decides what fields and research categories are relevant.
 """
 
-import json
-import re
-from openai import OpenAI
+from functools import lru_cache
+
+from openai import BadRequestError, ContentFilterFinishReasonError, LengthFinishReasonError, OpenAI
+from pydantic import BaseModel
 
 from src.config import OPENAI_MODEL
 
 
+@lru_cache(maxsize=None)
 def _client(api_key: str) -> OpenAI:
     return OpenAI(api_key=api_key)
 
 
+# Response schema, enforced by Structured Outputs so the reply needs no parsing
+class RCAFT(BaseModel):
+    role: str
+    context: str
+    action: str
+    format: str
+    tone: str
+
+
+class FieldGroup(BaseModel):
+    group_name: str
+    fields: list[str]
+    research_prompt: str
+
+
+class EnhancedPrompt(BaseModel):
+    enhanced_prompt: str
+    rcaft: RCAFT
+    search_keywords: list[str]
+    data_fields: list[str]
+    field_groups: list[FieldGroup]
+    target_sources: list[str]
+    location: str
+    domain: str
+
+
 def enhance_prompt(api_key: str, raw_input: str) -> dict:
     """
     Enhance raw user input using RCAFT. Returns everything needed
@@ -49,9 +77,6 @@ def enhance_prompt(api_key: str, raw_input: str) -> dict:
         "You must analyze the user's intent and produce a FULLY DYNAMIC output.\n"
         "The user could be searching for ANY type of business or data — restaurants, "
         "hospitals, hotels, IT companies, gyms, car dealers, lawyers, factories, etc.\n\n"
-        "Return ONLY a valid JSON object with these keys:\n"
-        "  enhanced_prompt, rcaft, search_keywords, data_fields, field_groups, "
-        "target_sources, location, domain\n\n"
         "CRITICAL — field_groups:\n"
         "  This is the most important part. Break the data collection into 3-5 research\n"
         "  groups, each targeting a DIFFERENT CATEGORY of information.\n"
@@ -87,23 +112,30 @@ def enhance_prompt(api_key: str, raw_input: str) -> dict:
         "IMPORTANT: Everything must be specific to what the user is actually searching for."
     )
 
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        temperature=0.3,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-    )
-
-    raw_response = resp.choices[0].message.content.strip()
-    result = _extract_json(raw_response)
+    try:
+        resp = client.beta.chat.completions.parse(
+            model=OPENAI_MODEL,
+            temperature=0.3,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            response_format=EnhancedPrompt,
+        )
+    except (LengthFinishReasonError, ContentFilterFinishReasonError):
+        return _fallback(raw_input)
+    except BadRequestError as e:
+        # e.g. an OPENAI_MODEL without Structured Outputs support
+        print(f"[Enhancer] Structured request rejected: {e}")
+        return _fallback(raw_input)
 
-    if not isinstance(result, dict) or "enhanced_prompt" not in result:
+    parsed = resp.choices[0].message.parsed
+    if parsed is None:  # refusal
         return _fallback(raw_input)
+    result = parsed.model_dump()
 
-    # Ensure field_groups exist
-    if "field_groups" not in result or not result["field_groups"]:
+    # The schema guarantees the key, not that the list is non-empty
+    if not result["field_groups"]:
         result["field_groups"] = _generate_default_field_groups(raw_input)
 
     return result
@@ -157,22 +189,3 @@ def _generate_default_field_groups(raw_input: str) -> list[dict]:
             ),
         },
     ]
-
-
-def _extract_json(text: str):
-    fence = re.search(r"```(?:json)?\s*([\s\S]*?)```", text)
-    if fence:
-        text = fence.group(1).strip()
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-    for sc, ec in [("{", "}"), ("[", "]")]:
-        s = text.find(sc)
-        e = text.rfind(ec)
-        if s != -1 and e != -1 and e > s:
-            try:
-                return json.loads(text[s : e + 1])
-            except json.JSONDecodeError:
-                continue
-    return None
@@ -3,7 +3,31 @@ SerpAPI module — Google Maps (with Place Details), Google Local, and Yelp.
 Pulls structured data directly from search engines via API.
 """
 
-from serpapi import GoogleSearch
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+
+from src.http_session import get_session
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+# SerpAPI results are stable for a fixed request and every call costs a credit,
+# so identical requests (Place Details included) are answered from memory for a day.
+# The cache lives as long as the server, so it is an LRU capped at CACHE_MAX_ENTRIES.
+CACHE_TTL = 86400
+CACHE_MAX_ENTRIES = 256
+_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_cache_lock = Lock()
+
+
+class SerpAPIError(RuntimeError):
+    """A SerpAPI request failed (bad key, exhausted quota, rate limit, server error).
+    Raised rather than returning no results, so callers don't cache the failure as empty."""
 
 
 # ── Google Maps listing search ──────────────────────────────────────
@@ -36,8 +60,7 @@ def search_google_maps(
         if lat is not None and lng is not None:
             params["ll"] = f"@{lat},{lng},{zoom}z"
 
-        search = GoogleSearch(params)
-        data = search.get_dict()
+        data = _serp_get(params)
         local_results = data.get("local_results", [])
 
         if not local_results:
@@ -54,26 +77,35 @@ def search_google_maps(
     return all_results[:num_results]
 
 
+# (record field, SerpAPI key). None marks a field derived in code; it is
+# still listed here so the column order stays fixed.
+_MAPS_FIELDS = (
+    ("Name", "title"),
+    ("Address", "address"),
+    ("Phone", "phone"),
+    ("Website", "website"),
+    ("Rating", "rating"),
+    ("Reviews Count", "reviews"),
+    ("Type / Category", "type"),
+    ("Hours", None),
+    ("Price Level", "price"),
+    ("Description", "description"),
+    ("Latitude", None),
+    ("Longitude", None),
+    ("Place ID", "place_id"),
+    ("Data ID", "data_id"),
+    ("Thumbnail", "thumbnail"),
+)
+
+
 def _parse_maps_item(item: dict) -> dict:
     """Parse a single Google Maps result into a flat record."""
-    record = {
-        "Name": item.get("title", ""),
-        "Address": item.get("address", ""),
-        "Phone": item.get("phone", ""),
-        "Website": item.get("website", ""),
-        "Rating": item.get("rating", ""),
-        "Reviews Count": item.get("reviews", ""),
-        "Type / Category": item.get("type", ""),
-        "Hours": _flatten_hours(item.get("operating_hours", item.get("hours", ""))),
-        "Price Level": item.get("price", ""),
-        "Description": item.get("description", ""),
-        "Latitude": item.get("gps_coordinates", {}).get("latitude", ""),
-        "Longitude": item.get("gps_coordinates", {}).get("longitude", ""),
-        "Place ID": item.get("place_id", ""),
-        "Data ID": item.get("data_id", ""),
-        "Thumbnail": item.get("thumbnail", ""),
-        "Data Source": "Google Maps",
-    }
+    record = {out: item.get(key, "") if key else "" for out, key in _MAPS_FIELDS}
+    record["Hours"] = _flatten_hours(item.get("operating_hours", item.get("hours", "")))
+    gps = item.get("gps_coordinates", {})
+    record["Latitude"] = gps.get("latitude", "")
+    record["Longitude"] = gps.get("longitude", "")
+    record["Data Source"] = "Google Maps"
 
     # Extract service options if available
     service_opts = item.get("service_options", {})
@@ -92,6 +124,23 @@ def _parse_maps_item(item: dict) -> dict:
 
 # ── Google Maps Place Details ───────────────────────────────────────
 
+# Place Details counterpart of _MAPS_FIELDS; Full Address and Plus Code are detail-page only
+_PLACE_FIELDS = (
+    ("Name", "title"),
+    ("Address", "address"),
+    ("Phone", "phone"),
+    ("Website", "website"),
+    ("Rating", "rating"),
+    ("Reviews Count", "reviews"),
+    ("Type / Category", "type"),
+    ("Description", "description"),
+    ("Price Level", "price"),
+    ("Hours", None),
+    ("Full Address", "address"),
+    ("Plus Code", "plus_code"),
+)
+
+
 def get_place_details(data_id: str, api_key: str) -> dict:
     """
     Get detailed info for a single place using its data_id.
@@ -104,27 +153,12 @@ def get_place_details(data_id: str, api_key: str) -> dict:
         "api_key": api_key,
         "hl": "en",
     }
-    search = GoogleSearch(params)
-    data = search.get_dict()
+    data = _serp_get(params)
 
     place = data.get("place_results", data)
-    info = {}
-
-    info["Name"] = place.get("title", "")
-    info["Address"] = place.get("address", "")
-    info["Phone"] = place.get("phone", "")
-    info["Website"] = place.get("website", "")
-    info["Rating"] = place.get("rating", "")
-    info["Reviews Count"] = place.get("reviews", "")
-    info["Type / Category"] = place.get("type", "")
-    info["Description"] = place.get("description", "")
-    info["Price Level"] = place.get("price", "")
+    info = {out: place.get(key, "") if key else "" for out, key in _PLACE_FIELDS}
     info["Hours"] = _flatten_hours(place.get("operating_hours", place.get("hours", "")))
 
-    # Rich fields from detail page
-    info["Full Address"] = place.get("address", "")
-    info["Plus Code"] = place.get("plus_code", "")
-
     # User reviews summary
     reviews_data = place.get("user_reviews", place.get("reviews_results", {}))
     if isinstance(reviews_data, dict):
@@ -156,8 +190,12 @@ def get_place_details(data_id: str, api_key: str) -> dict:
         busiest = []
         for day, hours_data in popular.items():
             if isinstance(hours_data, list):
-                peak = max(hours_data, key=lambda h: h.get("percentage", 0) if isinstance(h, dict) else 0, default={})
-                if isinstance(peak, dict) and peak.get("percentage", 0) > 50:
+                # Single pass: keep the first hour strictly busier than 50%
+                peak, best = None, 50
+                for h in hours_data:
+                    if isinstance(h, dict) and h.get("percentage", 0) > best:
+                        peak, best = h, h["percentage"]
+                if peak is not None:
                     busiest.append(f"{day} {peak.get('time', '')}")
         if busiest:
             info["Busiest Times"] = "; ".join(busiest[:5])
@@ -170,32 +208,47 @@ def enrich_with_place_details(
     api_key: str,
     max_places: int = 20,
     progress_callback=None,
+    max_workers: int = 8,
 ) -> list[dict]:
     """
     For each record that has a data_id, fetch full place details
-    and merge the extra fields back in.
+    and merge the extra fields back in, until max_places lookups succeed.
+    Lookups run concurrently; a failed one is replaced by the next record
+    with a data_id. progress_callback fires from the calling thread as
+    each one completes.
     """
-    enriched = []
+    enriched = list(records)
+    candidates = (i for i, r in enumerate(records) if r.get("Data ID", ""))
+    pending = {}
     fetched = 0
 
-    for i, record in enumerate(records):
-        data_id = record.get("Data ID", "")
-        if data_id and fetched < max_places:
-            if progress_callback:
-                progress_callback(fetched, max_places, record.get("Name", ""))
-            try:
-                details = get_place_details(data_id, api_key)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        def _submit_next():
+            i = next(candidates, None)
+            if i is not None:
+                pending[pool.submit(get_place_details, records[i]["Data ID"], api_key)] = i
+
+        for _ in range(max_places):
+            _submit_next()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                if progress_callback:
+                    progress_callback(fetched, max_places, records[i].get("Name", ""))
+                try:
+                    details = future.result()
+                except Exception:
+                    _submit_next()
+                    continue
+                fetched += 1
                 # Merge: details fill in gaps, don't overwrite existing values
-                merged = {**record}
+                merged = {**records[i]}
                 for k, v in details.items():
                     if k not in merged or not merged[k]:
                         merged[k] = v
-                enriched.append(merged)
-                fetched += 1
-            except Exception as e:
-                enriched.append(record)
-        else:
-            enriched.append(record)
+                enriched[i] = merged
 
     return enriched
 
@@ -218,8 +271,7 @@ def search_google_local(
     if location:
         params["location"] = location
 
-    search = GoogleSearch(params)
-    data = search.get_dict()
+    data = _serp_get(params)
 
     for item in data.get("local_results", {}).get("places", []):
         results.append({
@@ -249,9 +301,11 @@ def search_google_web(
     Search regular Google for directory listings, review sites, and articles
     that contain business data not available on official websites.
     Returns structured records extracted from organic result snippets.
+    Every query is tried; if any failed, SerpAPIError is raised at the end.
     """
     all_results = []
     seen_urls = set()
+    failed = []
 
     for query in queries:
         params = {
@@ -265,8 +319,7 @@ def search_google_web(
             params["location"] = location
 
         try:
-            search = GoogleSearch(params)
-            data = search.get_dict()
+            data = _serp_get(params)
 
             # Organic results (directory pages, articles, etc.)
             for item in data.get("organic_results", []):
@@ -295,7 +348,10 @@ def search_google_web(
 
         except Exception as e:
             print(f"[SerpAPI/Web] Error searching '{query}': {e}")
+            failed.append(query)
 
+    if failed:
+        raise SerpAPIError(f"{len(failed)} of {len(queries)} web searches failed")
     return all_results
 
 
@@ -314,8 +370,7 @@ def search_yelp(query: str, api_key: str, location: str = "", num_results: int =
         params["find_loc"] = location
 
     try:
-        search = GoogleSearch(params)
-        data = search.get_dict()
+        data = _serp_get(params)
 
         for item in data.get("organic_results", []):
             results.append({
@@ -332,6 +387,7 @@ def search_yelp(query: str, api_key: str, location: str = "", num_results: int =
             })
     except Exception as e:
         print(f"[SerpAPI/Yelp] Error: {e}")
+        raise
 
     return results[:num_results]
 
@@ -344,29 +400,103 @@ def search_serp_multiple(
     results_per_query: int = 40,
     lat: float | None = None,
     lng: float | None = None,
+    max_workers: int = 6,
 ) -> list[dict]:
-    """Run multiple Google Maps searches and deduplicate."""
-    all_results = []
-    seen_names = set()
-
-    for query in queries:
+    """
+    Run multiple Google Maps searches and deduplicate.
+    Queries run concurrently; results are deduped in query order.
+    A listing is a duplicate if its Data ID or its canonical name was already seen.
+    Every query is tried; if any failed, SerpAPIError is raised at the end.
+    """
+    def _search(query: str) -> list[dict] | None:
         try:
-            results = search_google_maps(
+            return search_google_maps(
                 query, api_key, num_results=results_per_query, lat=lat, lng=lng
             )
-            for r in results:
-                name_key = r.get("Name", "").strip().lower()
-                if name_key and name_key not in seen_names:
-                    seen_names.add(name_key)
-                    all_results.append(r)
         except Exception as e:
             print(f"[SerpAPI] Error searching '{query}': {e}")
+            return None
 
+    all_results = []
+    seen_names = set()
+    seen_ids = set()
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for results in pool.map(_search, queries):
+            if results is None:
+                failed += 1
+                continue
+            for r in results:
+                name_key = _canonical_name(r.get("Name", ""))
+                data_id = r.get("Data ID", "")
+                if not name_key or name_key in seen_names or (data_id and data_id in seen_ids):
+                    continue
+                seen_names.add(name_key)
+                if data_id:
+                    seen_ids.add(data_id)
+                all_results.append(r)
+
+    if failed:
+        raise SerpAPIError(f"{failed} of {len(queries)} Maps searches failed")
     return all_results
 
 
 # ── Helpers ─────────────────────────────────────────────────────────
 
+def _serp_get(params: dict) -> dict:
+    """
+    Run one SerpAPI search over the shared pooled session, via the response cache.
+    Raises SerpAPIError on a failed request; only successful responses are cached.
+    """
+    # The API key doesn't change the result, so it is left out of the key
+    key = hashlib.sha256(
+        json.dumps({k: v for k, v in params.items() if k != "api_key"}, sort_keys=True).encode()
+    ).hexdigest()
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and now - hit[0] < CACHE_TTL:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    resp = get_session().get(SERPAPI_URL, params=params, timeout=60)
+    data = resp.json()
+    error = data.get("error", "")
+    # SerpAPI reports a search with no hits as an "error"; that one is a real (empty) result
+    if not resp.ok or (error and "hasn't returned any results" not in error):
+        raise SerpAPIError(error or f"HTTP {resp.status_code}")
+    if not error:
+        with _cache_lock:
+            _cache[key] = (now, data)
+            _cache.move_to_end(key)
+            _prune_cache(now)
+    return data
+
+
+def _prune_cache(now: float) -> None:
+    """Drop expired responses, then least recently used ones past the cap. Caller holds the lock."""
+    for key in [k for k, (stored, _) in _cache.items() if now - stored >= CACHE_TTL]:
+        del _cache[key]
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Drop every cached SerpAPI response."""
+    with _cache_lock:
+        _cache.clear()
+
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def _canonical_name(name: str) -> str:
+    """Letters and digits only, casefolded and without accents, so "Joe's Café" and "JOES cafe" collide."""
+    name = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub("", name.casefold())
+
+
 def _flatten_hours(hours) -> str:
     """Convert hours from dict/list to readable string."""
     if isinstance(hours, dict):